@@ -2,49 +2,69 @@
 Macro Risk Dashboard - Streamlit app.
 """
 import html
+import pandas as pd
 import streamlit as st
-from data_sources import get_all_data, is_fred_api_configured, fetch_fred_series
-from signals import build_metrics_table
-
-# Tooltips for table metrics (keys match df["Metric"] exactly). Under 40 words each.
-METRIC_TOOLTIPS = {
-    "HY OAS (BAML)": (
-        "ICE BofA US High Yield Option-Adjusted Spread (BAMLH0A0HYM2). "
-        "Measures high-yield bond spread over Treasuries. Widening signals credit stress and rising default risk; key for systemic risk."
-    ),
-    "Fed Balance Sheet (WALCL)": (
-        "Federal Reserve total assets (WALCL). Reflects QE/QT and liquidity provision. "
-        "Shrinking can tighten financial conditions and amplify stress."
-    ),
-    "HYG": (
-        "iShares iBoxx High Yield Corporate Bond ETF. Tracks high-yield bond performance. "
-        "Weakness signals credit repricing and risk-off sentiment; credit risk indicator."
-    ),
-    "JNK": (
-        "SPDR Bloomberg High Yield Bond ETF. Proxy for high-yield credit. "
-        "Declines indicate credit stress and flight to quality; systemic risk signal."
-    ),
-    "SPY": (
-        "SPDR S&P 500 ETF. Broad US equity market proxy. "
-        "Used as growth and risk-on indicator; falls signal stress and regime shift."
-    ),
-    "XLF": (
-        "Financial Select Sector SPDR. US financial sector equity proxy. "
-        "Leading indicator of systemic and tail risk in banking and financial conditions."
-    ),
-    "KRE": (
-        "SPDR S&P Regional Banking ETF. Regional bank equity proxy. "
-        "Sensitive to funding and credit stress; tail risk and financial stability indicator."
-    ),
-    "UUP (Dollar)": (
-        "Invesco DB US Dollar Index. US dollar strength versus major currencies. "
-        "Strong dollar can tighten global financial conditions and amplify EM stress."
-    ),
-    "VIX": (
-        "CBOE Volatility Index. Options-implied S&P 500 volatility. "
-        "Elevation signals fear and stress; key gauge of market and macro risk."
-    ),
-}
+from data_sources import (
+    CACHE_TTL_SECONDS,
+    clear_data_cache,
+    get_all_data,
+    is_fred_api_configured,
+)
+from signals import TRADING_DAYS_4W, build_metrics_table
+from tooltips import METRIC_TIP_ATTRS
+
+# Static HTML for the section tables (page-invariant, built once at import)
+display_cols = ["Metric", "Current", "4W Trend", "Flag", "Notes"]
+_TD_STYLE = 'style="text-align: left; padding: 0.5rem 0.75rem; border-bottom: 1px solid #eee;"'
+_TABLE_OPEN = (
+    '<div class="dataframe-container">'
+    '<table style="width:100%; border-collapse: collapse; font-size: 0.9rem;">'
+    '<thead><tr style="border-bottom: 1px solid #ccc;">'
+    + "".join(f'<th style="text-align: left; padding: 0.5rem 0.75rem;">{c}</th>' for c in display_cols)
+    + "</tr></thead><tbody>"
+)
+_TABLE_CLOSE = "</tbody></table></div>"
+
+
+def _data_fingerprint(data: dict) -> tuple:
+    """
+    Cheap cache key for metrics_table: per series length, last timestamp and the
+    two points the table reads (last value, and the value TRADING_DAYS_4W back).
+    """
+    def key(k, v):
+        if not isinstance(v, pd.Series) or len(v) == 0:
+            return (k, 0, "", 0.0, 0.0)
+        old = float(v.iloc[-TRADING_DAYS_4W]) if len(v) >= TRADING_DAYS_4W else 0.0
+        return (k, len(v), str(v.index[-1]), float(v.iloc[-1]), old)
+
+    return tuple(key(k, v) for k, v in sorted(data.items()))
+
+
+# build_metrics_table is pure in `data`: UI-only reruns reuse the previous table
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False, hash_funcs={dict: _data_fingerprint})
+def metrics_table(data: dict):
+    """Cached build_metrics_table: (table_df, total_score, regime_label)."""
+    return build_metrics_table(data)
+
+
+def render_section(section: str, by_section: dict) -> None:
+    """Render one section as an HTML table with native hover tooltips on the Metric column."""
+    st.subheader(section)
+    section_df, section_tips = by_section.get(section, (None, []))
+    # Build HTML table so browser shows native tooltips (st.dataframe doesn't render Styler HTML)
+    parts = [_TABLE_OPEN]
+    if section_df is not None:
+        for tip_attr, row in zip(section_tips, section_df.itertuples(index=False, name=None)):
+            parts.append("<tr>")
+            for col, raw in zip(display_cols, row):
+                val = "" if raw != raw else str(raw)  # handle NaN
+                attr = tip_attr if col == "Metric" else ""
+                parts.append(f"<td {_TD_STYLE}{attr}>{html.escape(val)}</td>")
+            parts.append("</tr>")
+    parts.append(_TABLE_CLOSE)
+    st.markdown("".join(parts), unsafe_allow_html=True)
+    st.write("")
+
 
 st.set_page_config(page_title="Macro Risk Dashboard", layout="wide")
 st.title("Macro Risk Dashboard")
@@ -55,19 +75,18 @@ with st.sidebar:
         st.success("FRED API: configured")
     else:
         st.warning(
-            "FRED API: not set — HY OAS & WALCL may be blank. "
+            "FRED API: not set — HY OAS, WALCL, VIX & S&P 500 may be blank. "
             "Add secret `FRED_API_KEY` in app Settings → Secrets, then redeploy."
         )
 
 # Refresh button: clear cache and rerun
 if st.button("Refresh data"):
-    get_all_data.clear()
-    fetch_fred_series.clear()
+    clear_data_cache()
     st.rerun()
 
 # Load data and compute signals
 data = get_all_data()
-table_df, total_score, regime_label = build_metrics_table(data)
+table_df, total_score, regime_label = metrics_table(data)
 
 # Top metrics
 col1, col2 = st.columns(2)
@@ -80,41 +99,13 @@ st.divider()
 
 # Five sections with table (hover tooltips on Metric column via HTML title attribute)
 sections = ["Credit Risk", "Volatility", "Liquidity/Dollar", "Rates & Growth", "Tail Risk"]
-display_cols = ["Metric", "Current", "4W Trend", "Flag", "Notes"]
+# Metric tooltips for the whole table in one vectorized map, then one groupby pass
+# (instead of a boolean mask per section) yields each section's rows and tooltips
+tip_attrs = table_df["Metric"].map(METRIC_TIP_ATTRS).fillna("")
+by_section = {
+    s: (g[display_cols], tip_attrs[g.index].tolist())
+    for s, g in table_df.groupby("Section", sort=False)
+}
 
 for section in sections:
-    st.subheader(section)
-    section_df = table_df[table_df["Section"] == section][display_cols].reset_index(drop=True)
-    # Build HTML table so browser shows native tooltips (st.dataframe doesn't render Styler HTML)
-    td_style = 'style="text-align: left; padding: 0.5rem 0.75rem; border-bottom: 1px solid #eee;"'
-    body_rows = []
-    for _, row in section_df.iterrows():
-        cells = []
-        for col in display_cols:
-            raw = row[col]
-            val = "" if raw != raw else str(raw)  # handle NaN
-            escaped = html.escape(val)
-            if col == "Metric":
-                tip = METRIC_TOOLTIPS.get(val, "") or METRIC_TOOLTIPS.get(str(raw).strip(), "")
-                if tip:
-                    cells.append(f'<td {td_style} title="{html.escape(tip)}">{escaped}</td>')
-                else:
-                    cells.append(f"<td {td_style}>{escaped}</td>")
-            else:
-                cells.append(f"<td {td_style}>{escaped}</td>")
-        body_rows.append("<tr>" + "".join(cells) + "</tr>")
-    table_html = (
-        '<div class="dataframe-container">'
-        '<table style="width:100%; border-collapse: collapse; font-size: 0.9rem;">'
-        '<thead><tr style="border-bottom: 1px solid #ccc;">'
-        '<th style="text-align: left; padding: 0.5rem 0.75rem;">Metric</th>'
-        '<th style="text-align: left; padding: 0.5rem 0.75rem;">Current</th>'
-        '<th style="text-align: left; padding: 0.5rem 0.75rem;">4W Trend</th>'
-        '<th style="text-align: left; padding: 0.5rem 0.75rem;">Flag</th>'
-        '<th style="text-align: left; padding: 0.5rem 0.75rem;">Notes</th>'
-        '</tr></thead><tbody>'
-        + "".join(body_rows) +
-        "</tbody></table></div>"
-    )
-    st.markdown(table_html, unsafe_allow_html=True)
-    st.write("")
+    render_section(section, by_section)
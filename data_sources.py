@@ -1,18 +1,49 @@
 """
 Data sources for macro risk dashboard.
-Fetches FRED series and yfinance tickers; uses Streamlit caching with TTL.
+Fetches FRED series and yfinance tickers. Per-source fetches use in-memory Streamlit
+caching with TTL; the combined snapshot is also persisted to disk (one file) so it
+survives restarts, and is refetched once older than CACHE_TTL_SECONDS.
 """
 import io
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
+import numpy as np
 import pandas as pd
 import requests
 import yfinance as yf
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 
-FRED_SERIES = ["BAMLH0A0HYM2", "WALCL"]  # HY OAS, Fed balance sheet
-YF_TICKERS = ["HYG", "JNK", "SPY", "XLF", "KRE", "UUP", "^VIX"]
+FRED_SERIES = ["BAMLH0A0HYM2", "WALCL", "VIXCLS", "SP500"]  # HY OAS, Fed balance sheet, VIX, S&P 500
+YF_TICKERS = ["HYG", "JNK", "XLF", "KRE", "UUP"]
 CACHE_TTL_SECONDS = 900
+# Days of history to fetch; the 4W change needs ~20 observations
+HISTORY_DAYS = 90
+# Weekly FRED series need a longer window to hold 20+ observations
+FRED_HISTORY_DAYS = {"WALCL": 200}
+
+
+@st.cache_resource
+def _http_session() -> requests.Session:
+    """Shared HTTP session: pooled keep-alive connections (no TLS handshake per call) + retries."""
+    s = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504)),
+    )
+    s.mount("https://", adapter)
+    s.headers["User-Agent"] = "MacroRiskDashboard/1.0 (Streamlit)"
+    return s
+
+
+def _fred_start_date(series_id: str) -> str:
+    """First observation date to request for a FRED series (YYYY-MM-DD)."""
+    days = FRED_HISTORY_DAYS.get(series_id, HISTORY_DAYS)
+    return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
 
 
 def _get_fred_api_key():
@@ -35,15 +66,14 @@ def is_fred_api_configured():
 
 def _parse_fred_csv(text: str, series_id: str) -> pd.Series:
     """Parse FRED-style CSV (DATE + value column) into a Series."""
-    df = pd.read_csv(io.StringIO(text))
-    date_col = df.columns[0]
-    value_col = df.columns[1] if len(df.columns) > 1 else df.columns[0]
-    df[date_col] = pd.to_datetime(df[date_col])
-    df = df.set_index(date_col).sort_index()
-    # FRED uses "." for missing; coerce to numeric and dropna
-    s = pd.to_numeric(df[value_col], errors="coerce").dropna()
+    # FRED uses "." for missing; unparseable values and dates are dropped, not fatal
+    df = pd.read_csv(io.StringIO(text), index_col=0, na_values=["."])
+    s = pd.to_numeric(df.iloc[:, 0], errors="coerce")
+    s.index = pd.to_datetime(s.index, errors="coerce")
+    s = s[s.index.notna() & s.notna()]
+    s.index.name = None
     s.name = series_id
-    return s
+    return s.sort_index()
 
 
 def _fetch_fred_via_api(series_id: str, api_key: str) -> pd.Series:
@@ -53,35 +83,33 @@ def _fetch_fred_via_api(series_id: str, api_key: str) -> pd.Series:
         "series_id": series_id,
         "api_key": api_key,
         "file_type": "json",
+        "observation_start": _fred_start_date(series_id),
     }
     try:
-        r = requests.get(url, params=params, timeout=15)
+        r = _http_session().get(url, params=params, timeout=15)
         r.raise_for_status()
         data = r.json()
         obs = data.get("observations", [])
         if not obs:
             return pd.Series(dtype=float)
-        dates = []
-        values = []
-        for o in obs:
-            v = o.get("value", ".")
-            if v == ".":
-                continue
-            try:
-                values.append(float(v))
-                dates.append(pd.to_datetime(o["date"]))
-            except (ValueError, TypeError):
-                continue
-        if not dates:
+        # FRED uses "." for missing; convert dates and values in one pass each
+        pairs = [(o.get("date"), o.get("value", ".")) for o in obs if o.get("value", ".") != "."]
+        if not pairs:
+            return pd.Series(dtype=float)
+        dates, values = zip(*pairs)
+        idx = pd.to_datetime(list(dates), errors="coerce")
+        arr = pd.to_numeric(list(values), errors="coerce").astype(float)
+        mask = ~np.isnan(arr) & ~idx.isna()
+        if not mask.any():
             return pd.Series(dtype=float)
-        s = pd.Series(values, index=pd.DatetimeIndex(dates)).sort_index()
+        s = pd.Series(arr[mask], index=idx[mask]).sort_index()
         s.name = series_id
         return s
     except Exception:
         return pd.Series(dtype=float)
 
 
-@st.cache_data(ttl=CACHE_TTL_SECONDS)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def fetch_fred_series(series_id: str) -> pd.Series:
     """Fetch a single FRED series. Uses API if key set; else tries CSV and gateway."""
     api_key = _get_fred_api_key()
@@ -89,12 +117,11 @@ def fetch_fred_series(series_id: str) -> pd.Series:
         s = _fetch_fred_via_api(series_id, api_key)
         if len(s) > 0:
             return s
-    headers = {"User-Agent": "MacroRiskDashboard/1.0 (Streamlit)"}
     try:
-        r = requests.get(
-            f"https://fred.stlouisfed.org/graph/fredgraph.csv?id={series_id}",
+        r = _http_session().get(
+            f"https://fred.stlouisfed.org/graph/fredgraph.csv?id={series_id}"
+            f"&cosd={_fred_start_date(series_id)}",
             timeout=15,
-            headers=headers,
         )
         r.raise_for_status()
         if r.text and "date" in r.text.lower().split("\n")[0]:
@@ -104,10 +131,9 @@ def fetch_fred_series(series_id: str) -> pd.Series:
     except Exception:
         pass
     try:
-        r = requests.get(
+        r = _http_session().get(
             f"https://www.ivo-welch.info/cgi-bin/fredwrap?symbol={series_id}",
             timeout=15,
-            headers=headers,
         )
         r.raise_for_status()
         if r.text and len(r.text.strip()) > 10 and "date" in r.text.lower()[:200]:
@@ -119,36 +145,75 @@ def fetch_fred_series(series_id: str) -> pd.Series:
     return pd.Series(dtype=float)
 
 
-@st.cache_data(ttl=CACHE_TTL_SECONDS)
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
 def fetch_yfinance_tickers(tickers: list[str]) -> dict[str, pd.Series]:
     """Fetch yfinance history for given tickers; returns dict of close price Series."""
     end = datetime.now()
-    start = end - timedelta(days=90)
+    start = end - timedelta(days=HISTORY_DAYS)
+    # One batched Yahoo query for all tickers instead of one request per ticker
+    try:
+        df = yf.download(
+            " ".join(tickers),
+            start=start,
+            end=end,
+            auto_adjust=True,
+            group_by="ticker",
+            threads=True,
+            progress=False,
+        )
+    except Exception:
+        df = None
     out = {}
     for t in tickers:
         try:
-            obj = yf.Ticker(t)
-            hist = obj.history(start=start, end=end, auto_adjust=True)
-            if hist is not None and not hist.empty and "Close" in hist.columns:
-                s = hist["Close"].sort_index()
-                s.name = t
-                out[t] = s
-            else:
-                out[t] = pd.Series(dtype=float)
+            s = df[t]["Close"].dropna().sort_index()
+            s.name = t
+            out[t] = s
         except Exception:
             out[t] = pd.Series(dtype=float)
     return out
 
 
-@st.cache_data(ttl=CACHE_TTL_SECONDS)
+# Streamlit ignores ttl for disk-persisted caches, so the snapshot carries its fetch
+# time and get_all_data() expires it. No arguments means a single cache key: the
+# disk entry is overwritten in place rather than accumulating one file per window.
+@st.cache_data(persist="disk", show_spinner=False)
+def _fetch_all_data() -> tuple[float, dict]:
+    """
+    Fetch all macro data: FRED series + yfinance. Returns (fetched_at, data).
+    Requests are I/O-bound and independent, so they run concurrently.
+    """
+    data = {}
+    with ThreadPoolExecutor(max_workers=len(FRED_SERIES) + 1) as pool:
+        futures = {pool.submit(fetch_fred_series, sid): sid for sid in FRED_SERIES}
+        yf_future = pool.submit(fetch_yfinance_tickers, YF_TICKERS)
+        for fut in as_completed(futures):
+            sid = futures[fut]
+            try:
+                data[sid] = fut.result()
+            except Exception:
+                data[sid] = pd.Series(dtype=float)
+        try:
+            data.update(yf_future.result())
+        except Exception:
+            data.update({t: pd.Series(dtype=float) for t in YF_TICKERS})
+    return time.time(), data
+
+
 def get_all_data() -> dict:
     """
     Fetch all macro data: FRED series + yfinance.
     Returns dict mapping symbol -> pandas Series (with datetime index).
+    Served from the disk-persisted snapshot while it is younger than CACHE_TTL_SECONDS.
     """
-    data = {}
-    for sid in FRED_SERIES:
-        data[sid] = fetch_fred_series(sid)
-    yf_data = fetch_yfinance_tickers(YF_TICKERS)
-    data.update(yf_data)
+    fetched_at, data = _fetch_all_data()
+    if time.time() - fetched_at >= CACHE_TTL_SECONDS:
+        _fetch_all_data.clear()
+        fetched_at, data = _fetch_all_data()
     return data
+
+
+def clear_data_cache() -> None:
+    """Drop the persisted snapshot and cached FRED series so the next load refetches."""
+    _fetch_all_data.clear()
+    fetch_fred_series.clear()
@@ -2,6 +2,7 @@
 Signal generation for macro risk dashboard.
 Thresholds, scoring (Green=0, Yellow=1, Red=2), regime labels, 4W trend and flags.
 """
+from bisect import bisect_left
 from typing import Optional, Tuple
 
 import pandas as pd
@@ -10,6 +11,12 @@ import numpy as np
 # ~20 trading days for 4-week lookback
 TRADING_DAYS_4W = 20
 
+# Flag cut-offs (green/yellow, yellow/red). Level metrics: <lo green, <=hi yellow, else red.
+# 4W-change metrics: >=lo green, >=hi yellow, else red. Missing values are yellow.
+HY_OAS_CUTS = (4, 6)
+VIX_CUTS = (20, 30)
+ETF_4W_CUTS = (-2, -6)
+
 # Regime by total score
 REGIMES = [
     (0, 4, "Expansion"),
@@ -17,15 +24,22 @@ REGIMES = [
     (9, 14, "Stress Building"),
     (15, 999, "Crisis"),
 ]
+# Lookup form of REGIMES: inclusive upper bounds of all but the last band
+_REGIME_CUTS = tuple(hi for _, hi, _ in REGIMES[:-1])
+_REGIME_LABELS = tuple(label for _, _, label in REGIMES)
 
 
 def _pct_change_4w(series: pd.Series, last_n: int = TRADING_DAYS_4W) -> Optional[float]:
     """4-week percent change using last_n points (for daily series)."""
-    if series is None or len(series) < 2 or last_n >= len(series):
+    if series is None:
+        return None
+    # Read the two endpoints straight from the ndarray; no intermediate Series
+    arr = series.to_numpy(copy=False)
+    n = arr.shape[0]
+    if n < 2 or last_n >= n:
         return None
-    recent = series.iloc[-last_n:]
-    old = recent.iloc[0]
-    new = recent.iloc[-1]
+    old = arr[-last_n]
+    new = arr[-1]
     if old == 0 or np.isnan(old):
         return None
     return float((new - old) / old * 100)
@@ -42,37 +56,49 @@ def trend_arrow(pct: Optional[float]) -> str:
     return "→"
 
 
+def _flag_levels_vec(values: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    """Level-based flags: <lo 0, lo–hi 1, >hi 2; NaN 1."""
+    flags = np.select([values < lo, values <= hi], [0, 1], 2).astype(np.int8)
+    flags[np.isnan(values)] = 1
+    return flags
+
+
+def _hy_flag_vec(values: np.ndarray) -> np.ndarray:
+    """Level flags for HY OAS values (HY_OAS_CUTS)."""
+    return _flag_levels_vec(values, *HY_OAS_CUTS)
+
+
+def _vix_flag_vec(values: np.ndarray) -> np.ndarray:
+    """Level flags for VIX values (VIX_CUTS)."""
+    return _flag_levels_vec(values, *VIX_CUTS)
+
+
+def _etf_flag_vec(pcts: np.ndarray) -> np.ndarray:
+    """4W-change flags (ETF_4W_CUTS): >=lo 0, >=hi 1, else 2; NaN 1."""
+    lo, hi = ETF_4W_CUTS
+    flags = np.select([pcts >= lo, pcts >= hi], [0, 1], 2).astype(np.int8)
+    flags[np.isnan(pcts)] = 1
+    return flags
+
+
+def _scalar_flag(flag_vec, value: Optional[float]) -> int:
+    """Apply an array flag rule to a single (possibly missing) value."""
+    return int(flag_vec(np.array([np.nan if value is None else value], dtype=float))[0])
+
+
 def flag_hy_oas(value: Optional[float]) -> int:
-    """HY OAS: <4 green=0, 4–6 yellow=1, >6 red=2."""
-    if value is None or np.isnan(value):
-        return 1
-    if value < 4:
-        return 0
-    if value <= 6:
-        return 1
-    return 2
+    """HY OAS level flag (HY_OAS_CUTS): green=0, yellow=1, red=2."""
+    return _scalar_flag(_hy_flag_vec, value)
 
 
 def flag_vix(value: Optional[float]) -> int:
-    """VIX: <20 green=0, 20–30 yellow=1, >30 red=2."""
-    if value is None or np.isnan(value):
-        return 1
-    if value < 20:
-        return 0
-    if value <= 30:
-        return 1
-    return 2
+    """VIX level flag (VIX_CUTS): green=0, yellow=1, red=2."""
+    return _scalar_flag(_vix_flag_vec, value)
 
 
 def flag_etf_4w(pct: Optional[float]) -> int:
-    """ETFs / 4W-based: green >=-2%, yellow -2% to -6%, red <=-6%."""
-    if pct is None or np.isnan(pct):
-        return 1
-    if pct >= -2:
-        return 0
-    if pct >= -6:
-        return 1
-    return 2
+    """ETFs / 4W-based flag on % change (ETF_4W_CUTS): green=0, yellow=1, red=2."""
+    return _scalar_flag(_etf_flag_vec, pct)
 
 
 def flag_label(flag: int) -> str:
@@ -88,61 +114,56 @@ METRIC_CONFIG = [
     ("Credit Risk", "HY OAS (BAML)", "BAMLH0A0HYM2", "hy_oas", None),
     ("Credit Risk", "HYG", "HYG", "etf_4w", None),
     ("Credit Risk", "JNK", "JNK", "etf_4w", None),
-    ("Volatility", "VIX", "^VIX", "vix", None),
+    ("Volatility", "VIX", "VIXCLS", "vix", None),
     ("Liquidity/Dollar", "Fed Balance Sheet (WALCL)", "WALCL", "etf_4w", "4W % chg"),
     ("Liquidity/Dollar", "UUP (Dollar)", "UUP", "etf_4w", None),
-    ("Rates & Growth", "SPY", "SPY", "etf_4w", None),
+    ("Rates & Growth", "S&P 500", "SP500", "etf_4w", None),
     ("Tail Risk", "XLF", "XLF", "etf_4w", None),
     ("Tail Risk", "KRE", "KRE", "etf_4w", None),
 ]
 
 
+# Column views of METRIC_CONFIG, built once so the table can be computed column-wise
+_SECTIONS, _DISPLAY_NAMES, _KEYS, _FLAG_TYPES, _NOTE_HINTS = (list(c) for c in zip(*METRIC_CONFIG))
+_HY_MASK = np.array([ft == "hy_oas" for ft in _FLAG_TYPES])
+_VIX_MASK = np.array([ft == "vix" for ft in _FLAG_TYPES])
+# flag_label as a lookup array, indexed by the int flag codes
+_FLAG_LABELS = np.array([flag_label(f) for f in range(3)], dtype=object)
+
+
 def build_metrics_table(data: dict) -> Tuple[pd.DataFrame, int, str]:
     """
     Build table-ready dataframe with Metric, Current, 4W Trend, Flag, Notes.
     Also returns total_risk_score and regime_label.
     """
-    rows = []
-    total_score = 0
-
-    for section, display_name, key, flag_type, note_hint in METRIC_CONFIG:
-        series = data.get(key)
-        if series is None or not isinstance(series, pd.Series):
-            current = None
-            pct_4w = None
-        else:
-            current = float(series.iloc[-1]) if len(series) > 0 else None
-            pct_4w = _pct_change_4w(series, TRADING_DAYS_4W)
-
-        if flag_type == "hy_oas":
-            flag = flag_hy_oas(current)
-        elif flag_type == "vix":
-            flag = flag_vix(current)
-        else:
-            flag = flag_etf_4w(pct_4w)
-
-        total_score += flag
-        arrow = trend_arrow(pct_4w)
-        notes = note_hint or ""
-        if current is not None and not np.isnan(current):
-            current_str = f"{current:.2f}" if key != "WALCL" else f"{current:,.0f}"
-        else:
-            current_str = "—"
-        rows.append({
-            "Section": section,
-            "Metric": display_name,
-            "Current": current_str,
-            "4W Trend": arrow,
-            "Flag": flag_label(flag),
-            "Notes": notes,
-        })
-
-    df = pd.DataFrame(rows)
-
-    regime_label = "Unknown"
-    for lo, hi, label in REGIMES:
-        if lo <= total_score <= hi:
-            regime_label = label
-            break
+    series_list = [data.get(key) for key in _KEYS]
+    series_list = [s if isinstance(s, pd.Series) else None for s in series_list]
+    currents = np.array(
+        [float(s.to_numpy()[-1]) if s is not None and len(s) > 0 else np.nan for s in series_list]
+    )
+    pcts = np.array([_pct_change_4w(s, TRADING_DAYS_4W) for s in series_list], dtype=float)
+
+    # Level-based flags on the current value, 4W-change flags otherwise
+    flags = np.select(
+        [_HY_MASK, _VIX_MASK],
+        [_hy_flag_vec(currents), _vix_flag_vec(currents)],
+        _etf_flag_vec(pcts),
+    ).astype(np.int8)
+    total_score = int(flags.sum())
+
+    current_strs = [
+        "—" if np.isnan(c) else (f"{c:,.0f}" if key == "WALCL" else f"{c:.2f}")
+        for c, key in zip(currents, _KEYS)
+    ]
+    df = pd.DataFrame({
+        "Section": _SECTIONS,
+        "Metric": _DISPLAY_NAMES,
+        "Current": current_strs,
+        "4W Trend": [trend_arrow(p) for p in pcts],
+        "Flag": _FLAG_LABELS[flags],
+        "Notes": [n or "" for n in _NOTE_HINTS],
+    })
+
+    regime_label = _REGIME_LABELS[bisect_left(_REGIME_CUTS, total_score)]
 
     return df, total_score, regime_label
@@ -0,0 +1,47 @@
+"""
+Metric tooltips for the macro risk dashboard table.
+"""
+import html
+
+# Tooltips for table metrics (keys match df["Metric"] exactly). Under 40 words each.
+METRIC_TOOLTIPS = {
+    "HY OAS (BAML)": (
+        "ICE BofA US High Yield Option-Adjusted Spread (BAMLH0A0HYM2). "
+        "Measures high-yield bond spread over Treasuries. Widening signals credit stress and rising default risk; key for systemic risk."
+    ),
+    "Fed Balance Sheet (WALCL)": (
+        "Federal Reserve total assets (WALCL). Reflects QE/QT and liquidity provision. "
+        "Shrinking can tighten financial conditions and amplify stress."
+    ),
+    "HYG": (
+        "iShares iBoxx High Yield Corporate Bond ETF. Tracks high-yield bond performance. "
+        "Weakness signals credit repricing and risk-off sentiment; credit risk indicator."
+    ),
+    "JNK": (
+        "SPDR Bloomberg High Yield Bond ETF. Proxy for high-yield credit. "
+        "Declines indicate credit stress and flight to quality; systemic risk signal."
+    ),
+    "S&P 500": (
+        "S&P 500 index (FRED SP500). Broad US equity market benchmark. "
+        "Used as growth and risk-on indicator; falls signal stress and regime shift."
+    ),
+    "XLF": (
+        "Financial Select Sector SPDR. US financial sector equity proxy. "
+        "Leading indicator of systemic and tail risk in banking and financial conditions."
+    ),
+    "KRE": (
+        "SPDR S&P Regional Banking ETF. Regional bank equity proxy. "
+        "Sensitive to funding and credit stress; tail risk and financial stability indicator."
+    ),
+    "UUP (Dollar)": (
+        "Invesco DB US Dollar Index. US dollar strength versus major currencies. "
+        "Strong dollar can tighten global financial conditions and amplify EM stress."
+    ),
+    "VIX": (
+        "CBOE Volatility Index (FRED VIXCLS). Options-implied S&P 500 volatility. "
+        "Elevation signals fear and stress; key gauge of market and macro risk."
+    ),
+}
+
+# Pre-escaped HTML title attributes for the Metric column
+METRIC_TIP_ATTRS = {k: f' title="{html.escape(v)}"' for k, v in METRIC_TOOLTIPS.items()}